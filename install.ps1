@@ -38,8 +38,13 @@ python -m pip install --upgrade pip
 Write-Host "`nInstalling Python dependencies..." -ForegroundColor Yellow
 
 $packages = @(
+    "numpy",
+    "tqdm",
+    "ollama",
+    "pysbd",
+    "pymupdf",
     "pdfplumber",
-    "python-docx", 
+    "python-docx",
     "transformers",
     "torch",
     "torchvision",
@@ -94,6 +99,7 @@ Write-Host "`nDownloading required Ollama models..." -ForegroundColor Yellow
 Write-Host "This may take a while depending on your internet connection..." -ForegroundColor Cyan
 
 $models = @(
+    "gemma2:2b-instruct-q4_K_M",
     "gemma2:27b",
     "deepseek-r1:32b", 
     "llama3.1:latest"
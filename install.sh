@@ -127,6 +127,11 @@ $PYTHON_CMD -m pip install --upgrade pip --user
 echo -e "\n${YELLOW}Installing Python dependencies...${NC}"
 
 packages=(
+    "numpy"
+    "tqdm"
+    "ollama"
+    "pysbd"
+    "pymupdf"
     "pdfplumber"
     "python-docx"
     "transformers"
@@ -189,6 +194,7 @@ echo -e "\n${YELLOW}Downloading required Ollama models...${NC}"
 echo -e "${CYAN}This may take a while depending on your internet connection...${NC}"
 
 models=(
+    "gemma2:2b-instruct-q4_K_M"
     "gemma2:27b"
     "deepseek-r1:32b"
     "llama3.1:latest"
@@ -1,65 +1,199 @@
+import asyncio
+import copy
+import io
+import json
+import logging
 import os
+import queue
+import re
+import threading
 import time
+import numpy as np
+import ollama
 import pdfplumber
+import torch
+from tqdm import tqdm
 from docx import Document
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from docx.shared import RGBColor
 from docx.enum.text import WD_COLOR_INDEX
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+# Buffered logging instead of raw print keeps stdout flushes out of the hot
+# loops; switch the level to DEBUG to get the old per-paragraph output back
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+LOG = logging.getLogger(__name__)
 
 ENABLE_OLLAMA = True  # Set to False to disable Ollama LLM translation
+# Concurrent in-flight Ollama requests; set OLLAMA_NUM_PARALLEL=8 (and
+# OLLAMA_MAX_LOADED_MODELS=1) on the server to actually serve them in parallel
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "8"))
+OLLAMA_CACHE_FILE = "ollama_cache.json"  # On-disk cache of Ollama translations
+OLLAMA_SENTENCE_MIN_CHARS = 40  # Paragraphs shorter than this are translated whole
+OLLAMA_PACK_MAX_CHARS = 120  # Paragraphs shorter than this travel as packed numbered lists
+OLLAMA_PACK_SIZE = 8  # How many short paragraphs share one packed request
+OLLAMA_SEMANTIC_THRESHOLD = 0.95  # Cosine similarity needed to reuse a near-duplicate's translation
+# Tried in order until one succeeds; the small 4-bit gemma2 comes first -
+# decoding is memory-bandwidth-bound, so a ~2B quantized model pushes several
+# times the tokens/s of an 8B+ one at near-equal quality for plain translation
+OLLAMA_MODELS = ["gemma2:2b-instruct-q4_K_M", "gemma3:27b-it-qat", "deepseek-r1:32b", "llama3.1:latest"]
+# Sent once as the chat system message; Ollama caches its KV per model, so
+# only the paragraph itself is prefilled on every request
+OLLAMA_SYSTEM_PROMPT = "You are a professional translation machine. Translate from Slovak to English. Output only the translation, nothing else."
 ENABLE_NLLB = False  # Set to False to disable NLLB translation
+# "facebook/nllb-200-distilled-1.3B" is more accurate; "Helsinki-NLP/opus-mt-sk-en"
+# is a ~3x smaller single-pair Marian model and the fastest option for sk->en only
+NLLB_MODEL_NAME = "facebook/nllb-200-distilled-600M"
+NLLB_BATCH_SIZE = 16  # Number of paragraphs translated per model.generate call
+USE_CTRANSLATE2 = False  # Set to True to run NLLB through CTranslate2 instead of HuggingFace
+CT2_MODEL_DIR = "nllb600-ct2"  # Converted CTranslate2 model directory (see comment at the loader)
+NLLB_QUANTIZATION = "int8"  # "int8", "bf16" or None - lower precision for faster CPU inference
+NLLB_NUM_BEAMS = 1  # Greedy decoding by default; raise for quality-critical runs
+NLLB_CACHE_FILE = "trans_cache.json"  # On-disk cache of already translated paragraphs
+CACHE_FLUSH_EVERY = 50  # Persist the translation caches every Nth new entry
+NLLB_MERGE_SEPARATOR = " ||| "  # Sentinel used to join short paragraphs into one request
+NLLB_MERGE_MAX_TOKENS = 128  # Token budget for one joint translation request
+NLLB_COMPILE = False  # Set to True to run the model through torch.compile (PyTorch >= 2)
+NLLB_LOCAL_DIR = "nllb-local"  # Safetensors copy of the model, saved after the first run for fast loads
+# Persist inductor's compiled graphs so torch.compile only pays the warmup once
+os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".torchinductor"))
+USE_PYMUPDF = True  # PDF word extraction via PyMuPDF's C parser (much faster than pdfplumber)
 docx_file = "MANUAL_PMW_ENG_MIRKA.docx"  # Your .docx file
 
-# Validate flags
-if not ENABLE_OLLAMA and not ENABLE_NLLB:
-    print("Error: At least one translation method must be enabled!")
-    print("Set ENABLE_OLLAMA=True and/or ENABLE_NLLB=True")
-    exit(1)
-
-print(f"Translation methods enabled:")
-print(f"  NLLB: {'Yes' if ENABLE_NLLB else 'No'}")
-print(f"  Ollama: {'Yes' if ENABLE_OLLAMA else 'No'}")
-print("-" * 40)
-
-def translate_with_context(text: str, context_paragraphs: list = None, max_retries: int = 3) -> str:
+if USE_PYMUPDF:
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        LOG.warning("PyMuPDF not installed - falling back to pdfplumber for PDF extraction")
+        USE_PYMUPDF = False
+
+# Validate flags (only when actually running the job - multiprocessing
+# workers re-import this module and must not exit or log)
+if __name__ == "__main__":
+    if not ENABLE_OLLAMA and not ENABLE_NLLB:
+        LOG.error("Error: At least one translation method must be enabled!")
+        LOG.error("Set ENABLE_OLLAMA=True and/or ENABLE_NLLB=True")
+        exit(1)
+
+    LOG.info(f"Translation methods enabled:")
+    LOG.info(f"  NLLB: {'Yes' if ENABLE_NLLB else 'No'}")
+    LOG.info(f"  Ollama: {'Yes' if ENABLE_OLLAMA else 'No'}")
+    LOG.info("-" * 40)
+
+# Purely numeric/punctuation paragraphs, URLs and e-mail addresses are not
+# worth translating (and translation often mangles them)
+_SKIP_RE = re.compile(r"^[\s\d\W]+$|^https?://|^[A-Za-z0-9_.\-]+@")
+
+# Optional fastText language id - drop lid.176.ftz next to the script
+# (https://fasttext.cc/docs/en/language-identification.html) to also skip
+# paragraphs that are already English; classification costs microseconds
+_LID_MODEL = None
+try:
+    import fasttext
+    if os.path.exists("lid.176.ftz"):
+        _LID_MODEL = fasttext.load_model("lid.176.ftz")
+except ImportError:
+    pass
+
+def should_skip_translation(text: str) -> bool:
+    """Return True for non-translatable paragraphs (numbers, codes, URLs, English)"""
+    if _SKIP_RE.match(text):
+        return True
+    # Require at least one word with two or more letters in it
+    if not any(sum(char.isalpha() for char in word) >= 2 for word in text.split()):
+        return True
+    # Already-English paragraphs (product names, quoted UI strings) stay as is
+    if _LID_MODEL is not None:
+        labels, probs = _LID_MODEL.predict(text.replace("\n", " "))
+        if labels[0] == "__label__en" and probs[0] > 0.9:
+            return True
+    return False
+
+# One persistent client for the whole run - the Ollama server keeps the model
+# loaded between requests instead of paying CLI startup per paragraph
+ollama_client = ollama.AsyncClient()
+
+# Optional semantic cache: manuals repeat the same sentence with one changed
+# word, and an embedding lookup lets such near-duplicates reuse an existing
+# translation instead of a fresh LLM call. Skipped when the library is missing.
+_SEMANTIC_MODEL = None
+if ENABLE_OLLAMA and __name__ == "__main__":
+    try:
+        from sentence_transformers import SentenceTransformer
+        _SEMANTIC_MODEL = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    except ImportError:
+        pass
+
+try:
+    import pysbd
+    _SENTENCE_SEG = pysbd.Segmenter(language="sk", clean=False)
+except ImportError:
+    _SENTENCE_SEG = None
+
+# Lines of a packed numbered-list response look like "3: <translation>"
+_PACK_LINE_RE = re.compile(r"^(\d+):\s*(.*)$")
+
+def _save_cache(path, cache):
+    """Dump a translation cache to disk (cheap enough to call periodically)"""
+    with open(path, "w", encoding="utf-8") as cache_file:
+        json.dump(cache, cache_file, ensure_ascii=False)
+
+def _clean(text: str) -> str:
+    """Strip a 'translated:' prefix and wrapping quotes from a model reply"""
+    if text.lower().startswith("translated:"):
+        text = text[11:].strip()
+    if text.startswith('"') and text.endswith('"'):
+        text = text[1:-1].strip()
+    elif text.startswith("'") and text.endswith("'"):
+        text = text[1:-1].strip()
+    return text
+
+def split_sentences(text: str) -> list:
+    """Split a paragraph into sentences (regex fallback when pysbd is missing)"""
+    if _SENTENCE_SEG is not None:
+        return [s.strip() for s in _SENTENCE_SEG.segment(text) if s.strip()]
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+async def translate_with_context(text: str, context_paragraphs: list = None, max_retries: int = 3) -> str:
     """
-    Translate text with optional context from previous paragraphs
+    Translate text with optional context from previous paragraphs.
+    Talks to the Ollama HTTP server through a persistent AsyncClient, so no
+    subprocess is spawned and the model stays loaded between requests.
     """
     for attempt in range(max_retries + 1):
-        # Build context section
-        context_section = ""
+        # The instruction lives in the system message, so the user message only
+        # carries the paragraph (plus optional context) - far fewer prefill tokens
+        user_content = text
         if context_paragraphs and len(context_paragraphs) > 0:
-            context_section = "\n\nPrevious context for better translation:\n"
+            context_section = "Previous context for better translation:\n"
             for i, ctx in enumerate(context_paragraphs[-3:], 1):  # Use last 3 paragraphs as context
                 context_section += f"Context {i}: \"{ctx}\"\n"
-        
-        prompt = f"""
-You are a professional translation machine. Translate the following sentence from Slovak to English.
-Use the provided context to ensure consistency and accuracy.
-Respond ONLY in this format:
-translated: <translated text>
-{context_section}
-Current sentence to translate: "{text}"
-translated:""".strip()
-
-        models = ["gemma3:27b-it-qat", "deepseek-r1:32b", "llama3.1:latest"]
+            user_content = f"{context_section}\nTranslate: {text}"
 
         # Try each model until one succeeds
-        for model in models:
-            print(f"  Trying model: {model}")
-            
+        for model in OLLAMA_MODELS:
+            LOG.debug(f"  Trying model: {model}")
+
             try:
-                result = subprocess.run(
-                    ["ollama", "run", model, prompt],
-                    capture_output=True,
-                    text=True,
+                response = await asyncio.wait_for(
+                    ollama_client.chat(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": OLLAMA_SYSTEM_PROMPT},
+                            {"role": "user", "content": user_content}
+                        ],
+                        options={"temperature": 0, "num_predict": 256},
+                        # Never evict the model between requests
+                        keep_alive=-1
+                    ),
                     timeout=120  # 2 minute timeout per model
                 )
 
                 # Extract output
-                output = result.stdout.strip()
-                
+                output = response["message"]["content"].strip()
+
                 # Handle DeepSeek thinking part removal
                 if model == "deepseek-r1:32b" and "<think>" in output:
                     # Find the end of thinking section
@@ -68,403 +202,741 @@ translated:""".strip()
                         # Remove everything up to and including </think>
                         output = output[think_end + 8:].strip()
 
-                # Find the line that starts with "translated:"
-                for line in output.splitlines():
-                    if line.lower().startswith("translated:"):
-                        # Clean up the translation
-                        translation = line[11:].strip()  # Remove "translated:" prefix
-                        
-                        # Remove quotes if present
-                        if translation.startswith('"') and translation.endswith('"'):
-                            translation = translation[1:-1].strip()
-                        elif translation.startswith("'") and translation.endswith("'"):
-                            translation = translation[1:-1].strip()
-                        
-                        if translation:  # Make sure we have actual content
-                            print(f"  Success with {model}")
-                            return translation
-
-                print(f"  Model {model} failed to produce valid translation")
-                
-            except subprocess.TimeoutExpired:
-                print(f"  Model {model} timed out")
+                # Some models still echo the old "translated:" prefix or quote the answer
+                translation = _clean(output)
+
+                if translation:  # Make sure we have actual content
+                    LOG.debug(f"  Success with {model}")
+                    return translation
+
+                LOG.warning(f"  Model {model} failed to produce valid translation")
+
+            except asyncio.TimeoutError:
+                LOG.warning(f"  Model {model} timed out")
                 continue
             except Exception as e:
-                print(f"  Model {model} error: {e}")
+                LOG.warning(f"  Model {model} error: {e}")
                 continue
 
         # If no model succeeded and we have retries left
         if attempt < max_retries:
-            print(f"  All models failed. Retry attempt {attempt + 1}/{max_retries}...")
-            time.sleep(2)  # Brief pause before retry
-        
+            LOG.warning(f"  All models failed. Retry attempt {attempt + 1}/{max_retries}...")
+            await asyncio.sleep(2)  # Brief pause before retry
+
     return f"[TRANSLATION FAILED AFTER {max_retries} RETRIES WITH ALL MODELS] {text}"
 
+async def translate_all_ollama(texts, on_result=None):
+    """
+    Fan out the paragraphs to the Ollama server with at most
+    OLLAMA_NUM_PARALLEL requests in flight and return the translations in
+    input order. Paragraphs run concurrently, so the rolling cross-paragraph
+    context is not used here. on_result(text, translation) is called as each
+    paragraph completes, letting the caller persist progress incrementally.
+    """
+    # Load the primary model into memory up front (an empty chat just loads
+    # the model) so the first real batch doesn't stall on a cold VRAM load,
+    # and pin it there - keep_alive=-1 disables eviction between requests
+    try:
+        await ollama_client.chat(model=OLLAMA_MODELS[0], messages=[], keep_alive=-1)
+    except Exception as e:
+        LOG.warning(f"Ollama warmup failed: {e}")
+
+    semaphore = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+
+    async def _limited(text):
+        async with semaphore:
+            return await translate_with_context(text)
+
+    async def _translate_one(text):
+        # Decode cost scales with output tokens, so long paragraphs are split
+        # into sentences that translate concurrently and reassemble in order
+        if len(text) >= OLLAMA_SENTENCE_MIN_CHARS:
+            sentences = split_sentences(text)
+            if len(sentences) > 1:
+                parts = await asyncio.gather(*[_limited(sentence) for sentence in sentences])
+                if not any(part.startswith("[TRANSLATION FAILED") for part in parts):
+                    return " ".join(parts)
+                LOG.warning("  Sentence-level translation failed, retrying whole paragraph")
+        return await _limited(text)
+
+    results = [None] * len(texts)
+
+    def _record(i, translated_text):
+        results[i] = translated_text
+        if on_result is not None:
+            on_result(texts[i], translated_text)
+
+    # Short paragraphs (headings, list items) pay nearly the full per-request
+    # overhead for a couple of words, so they ride together as one numbered
+    # list per request; everything else takes the per-paragraph path
+    short_indices = [i for i, text in enumerate(texts) if len(text) < OLLAMA_PACK_MAX_CHARS]
+    short_set = set(short_indices)
+    groups = [short_indices[start:start + OLLAMA_PACK_SIZE]
+              for start in range(0, len(short_indices), OLLAMA_PACK_SIZE)]
+
+    async def _translate_group(group):
+        if len(group) > 1:
+            prompt = ("Translate each numbered Slovak line to English. "
+                      "Output exactly one 'N: <translation>' per line.\n"
+                      + "\n".join(f"{n}: {texts[i]}" for n, i in enumerate(group, 1)))
+            parsed = {}
+            try:
+                async with semaphore:
+                    response = await asyncio.wait_for(
+                        ollama_client.chat(
+                            model=OLLAMA_MODELS[0],
+                            messages=[
+                                {"role": "system", "content": OLLAMA_SYSTEM_PROMPT},
+                                {"role": "user", "content": prompt}
+                            ],
+                            options={"temperature": 0, "num_predict": 96 * len(group)},
+                            keep_alive=-1
+                        ),
+                        timeout=120
+                    )
+                for line in response["message"]["content"].splitlines():
+                    match = _PACK_LINE_RE.match(line.strip())
+                    if match:
+                        parsed[int(match.group(1))] = match.group(2).strip()
+            except Exception as e:
+                LOG.warning(f"  Packed translation failed: {e}")
+
+            if all(parsed.get(n) for n in range(1, len(group) + 1)):
+                for n, i in enumerate(group, 1):
+                    _record(i, parsed[n])
+                return
+            LOG.warning(f"  Packed response unparseable, retrying {len(group)} lines individually")
+
+        # Single-line group or parse failure - per-paragraph fallback
+        fallback = await asyncio.gather(*[_limited(texts[i]) for i in group])
+        for i, translated_text in zip(group, fallback):
+            _record(i, translated_text)
+
+    async def _translate_long(i):
+        _record(i, await _translate_one(texts[i]))
+
+    await asyncio.gather(*([_translate_group(group) for group in groups]
+                           + [_translate_long(i) for i in range(len(texts)) if i not in short_set]))
+    return results
+
+def translate_texts_ollama(texts):
+    """
+    Resolve a list of texts through the persistent Ollama cache, fanning the
+    uncached ones out to the server concurrently. Returns translations
+    aligned with the input; failures carry the [TRANSLATION FAILED...] marker
+    and are never written to the cache.
+    """
+    # Repeated strings (headings, labels, boilerplate) are translated once and
+    # reused; the cache persists across runs. Keys are lowercased to catch
+    # trivial case variants, the stored output keeps its original casing.
+    ollama_cache = {}
+    if os.path.exists(OLLAMA_CACHE_FILE):
+        with open(OLLAMA_CACHE_FILE, "r", encoding="utf-8") as cache_file:
+            ollama_cache = json.load(cache_file)
+        LOG.info(f"Loaded {len(ollama_cache)} cached translations from {OLLAMA_CACHE_FILE}")
+
+    pending_texts = [text for text in dict.fromkeys(texts) if text.lower() not in ollama_cache]
+
+    # Near-duplicate reuse: embed the cached source texts once, and any pending
+    # text whose nearest neighbour is close enough borrows that translation.
+    # Both sides are L2-normalized, so the matmul gives cosine directly.
+    # Borrows live only in this run's results - persisting them would record
+    # an approximate translation as the text's permanent exact match.
+    semantic_hits = {}
+    if _SEMANTIC_MODEL is not None and pending_texts and ollama_cache:
+        known_texts = list(ollama_cache.keys())
+        known_emb = _SEMANTIC_MODEL.encode(known_texts, batch_size=64, normalize_embeddings=True)
+        pending_emb = _SEMANTIC_MODEL.encode([text.lower() for text in pending_texts], batch_size=64, normalize_embeddings=True)
+        similarities = pending_emb @ known_emb.T
+        best = np.argmax(similarities, axis=1)
+        best_scores = similarities[np.arange(len(pending_texts)), best]
+
+        still_pending = []
+        for text, neighbor, score in zip(pending_texts, best, best_scores):
+            if score >= OLLAMA_SEMANTIC_THRESHOLD:
+                semantic_hits[text.lower()] = ollama_cache[known_texts[neighbor]]
+            else:
+                still_pending.append(text)
+        if semantic_hits:
+            LOG.info(f"Semantic cache reused {len(semantic_hits)} near-duplicate translations")
+        pending_texts = still_pending
+
+    LOG.info(f"Starting Ollama translation of {len(pending_texts)} unique paragraphs "
+             f"({len(texts) - len(pending_texts)} repeats/cached) with up to {OLLAMA_NUM_PARALLEL} in flight...")
+
+    flush_pending = 0
+
+    def _record_result(text, translated_text):
+        # Runs on the event loop as each paragraph lands; flushing the cache
+        # every CACHE_FLUSH_EVERY new entries bounds what a crash can lose.
+        # Failed translations are never cached.
+        nonlocal flush_pending
+        if translated_text.startswith("[TRANSLATION FAILED AFTER"):
+            return
+        ollama_cache[text.lower()] = translated_text
+        flush_pending += 1
+        if flush_pending >= CACHE_FLUSH_EVERY:
+            flush_pending = 0
+            _save_cache(OLLAMA_CACHE_FILE, ollama_cache)
+
+    new_translations = asyncio.run(translate_all_ollama(pending_texts, on_result=_record_result))
+
+    # Failures are kept for this run's write-back even though they were not
+    # cached; semantic borrows likewise apply to this run only
+    run_results = dict(ollama_cache)
+    run_results.update(semantic_hits)
+    for text, translated_text in zip(pending_texts, new_translations):
+        run_results[text.lower()] = translated_text
+    _save_cache(OLLAMA_CACHE_FILE, ollama_cache)
+
+    # Old cache entries may still carry the pre-chat-API prefix or quotes
+    return [_clean(run_results[text.lower()]) for text in texts]
+
 # Add formatting function
 def apply_translation_with_formatting(paragraph, translated_text, original_text, error_prefix=""):
     """Apply translation while preserving formatting, with error handling."""
     try:
-        # Collect all formatting from existing runs
-        original_runs_formatting = []
-        for run in paragraph.runs:
-            formatting = {
-                'bold': run.bold,
-                'italic': run.italic,
-                'underline': run.underline,
-                'font_name': run.font.name,
-                'font_size': run.font.size,
-                'color': run.font.color.rgb if run.font.color.rgb else None
-            }
-            original_runs_formatting.append(formatting)
-        
-        # Clear paragraph and add translated text
-        paragraph.clear()
-        new_run = paragraph.add_run(translated_text)
-        
-        # Apply formatting from first run if available
-        if original_runs_formatting:
-            fmt = original_runs_formatting[0]
-            if fmt['bold'] is not None:
-                new_run.bold = fmt['bold']
-            if fmt['italic'] is not None:
-                new_run.italic = fmt['italic']
-            if fmt['underline'] is not None:
-                new_run.underline = fmt['underline']
-            if fmt['font_name']:
-                new_run.font.name = fmt['font_name']
-            if fmt['font_size']:
-                new_run.font.size = fmt['font_size']
-            if fmt['color']:
-                new_run.font.color.rgb = fmt['color']
-        
+        # Mutate the underlying lxml tree directly: one new run carrying a
+        # deep copy of the first run's properties replaces the paragraph
+        # content in a single pass, instead of clear() plus
+        # attribute-by-attribute copying through the python-docx proxies
+        p_element = paragraph._p
+        # The first run may sit inside a w:hyperlink (TOC entries, links),
+        # so search the whole subtree for the properties donor
+        first_run = next(p_element.iter(qn('w:r')), None)
+
+        new_run = OxmlElement('w:r')
+        if first_run is not None:
+            rPr = first_run.find(qn('w:rPr'))
+            if rPr is not None:
+                new_run.append(copy.deepcopy(rPr))
+        text_element = OxmlElement('w:t')
+        text_element.set(qn('xml:space'), 'preserve')
+        text_element.text = translated_text
+        new_run.append(text_element)
+
+        # Drop every content child (runs, hyperlinks, bookmarks) but keep the
+        # paragraph properties - the same scope paragraph.clear() removes.
+        # paragraph.text includes hyperlink text, so the translation already
+        # covers it; leaving w:hyperlink in place would duplicate it.
+        for child in list(p_element):
+            if child.tag != qn('w:pPr'):
+                p_element.remove(child)
+        p_element.append(new_run)
+
         return True
-        
+
     except Exception as e:
-        print(f"ERROR: Could not apply formatting: {e}")
+        LOG.error(f"ERROR: Could not apply formatting: {e}")
         return False
 
+def _highlight(run, text_color, highlight_color=WD_COLOR_INDEX.YELLOW):
+    """Style a manual-review run; falls back to plain bold if coloring fails"""
+    try:
+        run.font.highlight_color = highlight_color
+        run.font.color.rgb = text_color
+    except Exception:
+        pass
+    run.bold = True
+
 # Replace the old translate function call with the new one
 def translate(text: str, max_retries: int = 3) -> str:
     """Backward compatibility wrapper"""
-    return translate_with_context(text, None, max_retries)
+    return asyncio.run(translate_with_context(text, None, max_retries))
+
+# Initialize NLLB model only if enabled, and never in re-importing
+# multiprocessing workers - loading it is expensive and they don't need it
+if ENABLE_NLLB and __name__ == "__main__":
+    model_name = NLLB_MODEL_NAME
+    # After the first run a safetensors copy of the model sits in
+    # NLLB_LOCAL_DIR; loading it skips the hub checkout and deserializes
+    # several seconds faster, which dominates startup on small jobs
+    load_from = NLLB_LOCAL_DIR if os.path.isdir(NLLB_LOCAL_DIR) else model_name
+    save_local_copy = not USE_CTRANSLATE2 and load_from == model_name
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    LOG.info(f"NLLB device: {device}")
+    # use_fast=True forces the Rust tokenizer, which parallelizes across a
+    # batch internally and releases the GIL for the background tokenizer thread
+    tokenizer = AutoTokenizer.from_pretrained(load_from, use_fast=True)
+
+    # Marian-style single-pair models (Opus-MT) have no language codes; skip
+    # everything language-token related for them
+    IS_MULTILINGUAL = hasattr(tokenizer, "src_lang")
+
+    # Language token ids are looked up once here instead of on every generate
+    # call (convert_tokens_to_ids walks the vocab each time)
+    LANG_TOKEN_IDS = {lang: tokenizer.convert_tokens_to_ids(lang) for lang in ("eng_Latn", "slk_Latn")} if IS_MULTILINGUAL else {}
+
+    if USE_CTRANSLATE2:
+        # CTranslate2 runs the same NLLB weights in fused C++ kernels with int8 support.
+        # Convert the checkpoint once with:
+        #   ct2-transformers-converter --model facebook/nllb-200-distilled-600M --quantization int8 --output_dir nllb600-ct2
+        import ctranslate2
+        ct2_translator = ctranslate2.Translator(
+            CT2_MODEL_DIR,
+            device=device,
+            # int8 weights with fp16 activations on GPU, plain int8 on CPU
+            compute_type="int8_float16" if device == "cuda" else "int8",
+            inter_threads=1,
+            intra_threads=os.cpu_count()
+        )
+    else:
+        loaded_8bit = False
+        if device == "cuda" and NLLB_QUANTIZATION == "int8":
+            # Weight-only int8 through bitsandbytes halves the bytes streamed
+            # from VRAM per decoder matmul; generate is bandwidth-bound, so
+            # this is close to a straight speedup. Falls back to fp16 below.
+            try:
+                model = AutoModelForSeq2SeqLM.from_pretrained(load_from, load_in_8bit=True, device_map="auto", attn_implementation="sdpa", low_cpu_mem_usage=True)
+                loaded_8bit = True
+            except Exception as e:
+                LOG.info(f"WARNING: 8-bit load failed ({e}), falling back to fp16")
+                model = AutoModelForSeq2SeqLM.from_pretrained(load_from, torch_dtype=torch.float16, attn_implementation="sdpa", low_cpu_mem_usage=True).to(device)
+        elif device == "cuda":
+            # fp16 on GPU dispatches the matmuls to Tensor Cores
+            model = AutoModelForSeq2SeqLM.from_pretrained(load_from, torch_dtype=torch.float16, attn_implementation="sdpa", low_cpu_mem_usage=True).to(device)
+        elif NLLB_QUANTIZATION == "bf16":
+            # bf16 halves the bytes moved per weight on CPUs with AVX-512-BF16
+            model = AutoModelForSeq2SeqLM.from_pretrained(load_from, torch_dtype=torch.bfloat16, attn_implementation="sdpa", low_cpu_mem_usage=True)
+        else:
+            model = AutoModelForSeq2SeqLM.from_pretrained(load_from, attn_implementation="sdpa", low_cpu_mem_usage=True)
+
+        if save_local_copy and not loaded_8bit:
+            # One-time export, done before quantization so the local copy
+            # keeps the original weights
+            try:
+                model.save_pretrained(NLLB_LOCAL_DIR, safe_serialization=True)
+                tokenizer.save_pretrained(NLLB_LOCAL_DIR)
+                LOG.info(f"Saved local model copy to {NLLB_LOCAL_DIR}/ for faster future loads")
+            except Exception as e:
+                LOG.info(f"WARNING: could not save local model copy: {e}")
 
-# Initialize NLLB model only if enabled
-if ENABLE_NLLB:
-    # "facebook/nllb-200-distilled-600M" is a smaller model, but "facebook/nllb-200-distilled-1.3B" is more accurate
-    model_name = "facebook/nllb-200-distilled-600M"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        if device == "cpu" and NLLB_QUANTIZATION == "int8":
+            # Dynamic int8 quantization of the Linear layers (the bulk of NLLB compute)
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
 
-    src_text = "Hello, how are you?"
-    tokenizer.src_lang = "eng_Latn"
-    tokens = tokenizer(src_text, return_tensors="pt")
-    generated = model.generate(**tokens, forced_bos_token_id=tokenizer.convert_tokens_to_ids("slk_Latn"))
-    print(tokenizer.decode(generated[0], skip_special_tokens=True))
+        # Inference only - disables dropout and autograd-related bookkeeping
+        model.eval()
+
+        if NLLB_COMPILE:
+            # Fuses the operator graph so the decoder loop skips most of the
+            # Python-level nn.Module dispatch on every step
+            try:
+                model = torch.compile(model, mode="reduce-overhead", fullgraph=False)
+            except Exception as e:
+                LOG.info(f"WARNING: torch.compile failed, continuing with eager mode: {e}")
+
+        src_text = "Ahoj, ako sa mas?"
+        if IS_MULTILINGUAL:
+            tokenizer.src_lang = "slk_Latn"
+        tokens = tokenizer(src_text, return_tensors="pt")
+        # generate needs the inputs on the model's device, same as the batched path
+        tokens = {k: v.to(device) for k, v in tokens.items()}
+        generated = model.generate(**tokens, forced_bos_token_id=LANG_TOKEN_IDS.get("eng_Latn"))
+        LOG.info(tokenizer.decode(generated[0], skip_special_tokens=True))
+
+    # The source language never changes during a run, so set it once instead
+    # of on every tokenize call
+    if IS_MULTILINGUAL:
+        tokenizer.src_lang = "slk_Latn"
+
+    def tokenize_batch_nllb(texts):
+        """Tokenize a batch of Slovak texts into the form generate_batch_nllb expects"""
+        if USE_CTRANSLATE2:
+            # CTranslate2 takes subword tokens, so the tokenizer is only used for encode/decode
+            return [tokenizer.convert_ids_to_tokens(tokenizer(text)["input_ids"]) for text in texts]
+        return tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=256)
+
+    def generate_batch_nllb(encoded, target_langs=("eng_Latn",)):
+        """
+        Translate a tokenized batch into one or more target languages.
+        Returns a dict mapping each target language to its list of translations.
+        On the HuggingFace path the encoder runs once per batch and its outputs
+        are reused for every target language, so extra languages only pay the
+        decoder cost.
+        """
+        if USE_CTRANSLATE2:
+            source = encoded
+            all_translations = {}
+            for lang in target_langs:
+                results = ct2_translator.translate_batch(
+                    source,
+                    target_prefix=[[lang]] * len(source),
+                    beam_size=NLLB_NUM_BEAMS,
+                    max_batch_size=32
+                )
+                translations = []
+                for result in results:
+                    output_tokens = result.hypotheses[0][1:]  # Drop the target language prefix token
+                    translations.append(tokenizer.decode(tokenizer.convert_tokens_to_ids(output_tokens), skip_special_tokens=True))
+                all_translations[lang] = translations
+            return all_translations
+
+        tokens = {k: v.to(device) for k, v in encoded.items()}
+        input_len = tokens["input_ids"].shape[1]
+
+        all_translations = {}
+        # inference_mode is stricter than no_grad and also skips view tracking
+        with torch.inference_mode():
+            # Run the encoder once; generate only needs to re-run the decoder per language
+            encoder_outputs = model.get_encoder()(**tokens)
+
+            for lang in target_langs:
+                generated = model.generate(
+                    encoder_outputs=encoder_outputs,
+                    attention_mask=tokens["attention_mask"],
+                    forced_bos_token_id=(LANG_TOKEN_IDS.get(lang) or tokenizer.convert_tokens_to_ids(lang)) if IS_MULTILINGUAL else None,
+                    num_beams=NLLB_NUM_BEAMS,
+                    do_sample=False,
+                    # Cap output length so short inputs can't decode forever
+                    max_new_tokens=min(512, int(1.5 * input_len) + 8),
+                    early_stopping=NLLB_NUM_BEAMS > 1,
+                    length_penalty=1.0
+                )
+                all_translations[lang] = tokenizer.batch_decode(generated, skip_special_tokens=True)
+        return all_translations
+
+    def translate_batch_nllb(texts, target_langs=("eng_Latn",)):
+        """Tokenize and translate a batch in one call (see generate_batch_nllb)"""
+        return generate_batch_nllb(tokenize_batch_nllb(texts), target_langs)
+
+    def translate_texts_nllb(texts):
+        """
+        Resolve a list of Slovak texts to English through the persistent
+        cache. Only distinct uncached texts hit the model: short ones are
+        packed into joint requests, the requests are length-bucketed so each
+        batch pads to its own longest sequence, and tokenization of the next
+        batch overlaps generation of the current one. Returns translations
+        aligned with the input.
+        """
+        # Translate each distinct text only once; repeated strings (labels,
+        # headings, boilerplate) are resolved from the cache afterwards. The
+        # cache persists to disk so re-runs of the same document are nearly instant.
+        nllb_cache = {}
+        if os.path.exists(NLLB_CACHE_FILE):
+            with open(NLLB_CACHE_FILE, "r", encoding="utf-8") as cache_file:
+                nllb_cache = json.load(cache_file)
+            LOG.info(f"Loaded {len(nllb_cache)} cached translations from {NLLB_CACHE_FILE}")
+
+        unique_texts = [text for text in dict.fromkeys(texts) if text not in nllb_cache]
+        total_unique = len(unique_texts)
+        LOG.info(f"{len(texts)} paragraphs -> {total_unique} unique uncached texts to translate")
+
+        # Tokenize once up front; the lengths drive both the short-paragraph
+        # packing and the length bucketing below
+        token_ids = tokenizer(unique_texts, add_special_tokens=False)["input_ids"] if unique_texts else []
+        lengths = [len(ids) for ids in token_ids]
+
+        # Pack runs of short texts into joint requests: tiny paragraphs pay almost
+        # the full per-call overhead of generate, so translate them together and
+        # split the result on the separator afterwards
+        packed_groups = []
+        current_pack = []
+        current_len = 0
+        for i, length in enumerate(lengths):
+            if current_pack and current_len + length > NLLB_MERGE_MAX_TOKENS:
+                packed_groups.append(current_pack)
+                current_pack = []
+                current_len = 0
+            current_pack.append(i)
+            current_len += length
+        if current_pack:
+            packed_groups.append(current_pack)
+
+        packed_texts = [
+            unique_texts[group[0]] if len(group) == 1
+            else NLLB_MERGE_SEPARATOR.join(unique_texts[i] for i in group)
+            for group in packed_groups
+        ]
+        packed_lengths = [sum(lengths[i] for i in group) for group in packed_groups]
+        total_packed = len(packed_texts)
+        LOG.info(f"{total_unique} unique texts packed into {total_packed} translation requests")
+
+        # Sort requests by tokenized length so each batch only pads to the
+        # longest sequence in that batch (less wasted compute on pad tokens)
+        order = sorted(range(total_packed), key=lambda i: packed_lengths[i])
+
+        # Tokenize the next batch on a background thread while the model is busy
+        # generating the current one (the fast Rust tokenizer releases the GIL)
+        batch_queue = queue.Queue(maxsize=2)
+
+        def _tokenize_batches():
+            for batch_start in range(0, total_packed, NLLB_BATCH_SIZE):
+                batch_indices = order[batch_start:batch_start + NLLB_BATCH_SIZE]
+                batch_queue.put((batch_indices, tokenize_batch_nllb([packed_texts[i] for i in batch_indices])))
+            batch_queue.put(None)  # Signal that all batches were produced
+
+        threading.Thread(target=_tokenize_batches, daemon=True).start()
+
+        flush_pending = 0
+
+        def _unpack_and_cache(group, packed_translation):
+            # Split a joint translation back into its texts and cache them
+            # right away; flushing every CACHE_FLUSH_EVERY new entries means
+            # a crash mid-run loses at most that many finished translations
+            nonlocal flush_pending
+            if len(group) == 1:
+                resolved = {group[0]: packed_translation}
+            else:
+                parts = [part.strip() for part in packed_translation.split(NLLB_MERGE_SEPARATOR.strip())]
+                if len(parts) == len(group):
+                    resolved = dict(zip(group, parts))
+                else:
+                    # The separator did not survive translation - redo this group one by one
+                    LOG.info(f"Separator lost in joint translation, retrying {len(group)} paragraphs individually")
+                    retried = translate_batch_nllb([unique_texts[i] for i in group])["eng_Latn"]
+                    resolved = dict(zip(group, retried))
+            for i, translated_text in resolved.items():
+                nllb_cache[unique_texts[i]] = translated_text
+            flush_pending += len(resolved)
+            if flush_pending >= CACHE_FLUSH_EVERY:
+                flush_pending = 0
+                _save_cache(NLLB_CACHE_FILE, nllb_cache)
+
+        # tqdm tracks rate and ETA itself, one update per batch
+        progress = tqdm(total=total_packed, desc="NLLB translate", unit="req")
+        while True:
+            queued = batch_queue.get()
+            if queued is None:
+                break
+            batch_indices, batch_encoded = queued
+
+            # Translate the whole batch from Slovak to English in one generate call
+            batch_translations = generate_batch_nllb(batch_encoded)["eng_Latn"]
+
+            # Unpack and persist each request's translations as they complete
+            for i, translated_text in zip(batch_indices, batch_translations):
+                _unpack_and_cache(packed_groups[i], translated_text)
+            progress.update(len(batch_indices))
+        progress.close()
+
+        if total_unique:
+            _save_cache(NLLB_CACHE_FILE, nllb_cache)
+
+        # Resolve every text (repeats included) through the cache
+        return [nllb_cache[text] for text in texts]
 
 def extract_text_from_docx(docx_path):
     results = []
     doc = Document(docx_path)
     
     for para_num, paragraph in enumerate(doc.paragraphs, start=1):
-        if paragraph.text.strip():  
+        # paragraph.text walks the XML tree, so read it once
+        if (text := paragraph.text.strip()):
             results.append({
-                "text": paragraph.text.strip(),
+                "text": text,
                 "bbox": None,  
                 "page": para_num 
             })
     return results
 
-def extract_text_with_layout(pdf_path, merge_threshold=10):
+def _group_words(results, page_num, merge_threshold, word_texts, x0, x1, top, bottom):
+    """Group a page's words into lines with vectorized NumPy comparisons"""
+    word_count = len(word_texts)
+
+    # Merge a word into the previous group if it sits on the same line
+    # (similar y-coordinates) and is close horizontally
+    same_line = np.abs(np.diff(top)) <= merge_threshold
+    close_x = (x0[1:] - x1[:-1]) <= merge_threshold * 2
+    breaks = ~(same_line & close_x)
+
+    # A group starts at word 0 and after every break
+    group_starts = np.flatnonzero(np.concatenate(([True], breaks)))
+    group_ends = np.append(group_starts[1:], word_count)
+
+    # Aggregate each group's bbox in one shot
+    min_x0 = np.minimum.reduceat(x0, group_starts)
+    min_top = np.minimum.reduceat(top, group_starts)
+    max_x1 = np.maximum.reduceat(x1, group_starts)
+    max_bottom = np.maximum.reduceat(bottom, group_starts)
+
+    for g, (start, end) in enumerate(zip(group_starts, group_ends)):
+        results.append({
+            "text": " ".join(word_texts[start:end]),
+            "bbox": (float(min_x0[g]), float(min_top[g]), float(max_x1[g]), float(max_bottom[g])),
+            "page": page_num
+        })
+
+def _extract_pages(pdf_path, page_indices, merge_threshold):
+    """Worker that extracts grouped words from a subset of pages (runs in its own process)"""
     results = []
+
+    if USE_PYMUPDF:
+        # MuPDF does the parsing in C; each word is (x0, y0, x1, y1, text, ...)
+        pdf = fitz.open(pdf_path)
+        try:
+            for page_index in page_indices:
+                words = pdf[page_index].get_text("words")
+                if not words:
+                    continue
+                word_count = len(words)
+                word_texts = [w[4] for w in words]
+                x0 = np.fromiter((w[0] for w in words), dtype=np.float32, count=word_count)
+                top = np.fromiter((w[1] for w in words), dtype=np.float32, count=word_count)
+                x1 = np.fromiter((w[2] for w in words), dtype=np.float32, count=word_count)
+                bottom = np.fromiter((w[3] for w in words), dtype=np.float32, count=word_count)
+                _group_words(results, page_index + 1, merge_threshold, word_texts, x0, x1, top, bottom)
+        finally:
+            pdf.close()
+        return results
+
     with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            words = page.extract_words()
+        for page_index in page_indices:
+            words = pdf.pages[page_index].extract_words()
             if not words:
                 continue
-            
-            # Group words into lines/phrases
-            current_group = {
-                "text": words[0]["text"],
-                "bbox": (words[0]["x0"], words[0]["top"], words[0]["x1"], words[0]["bottom"]),
-                "page": page_num,
-                "words": [words[0]]
-            }
-            
-            for word in words[1:]:
-                # Check if word is close enough to current group
-                prev_word = current_group["words"][-1]
-                
-                # Merge if words are on same line (similar y-coordinates) and close horizontally
-                if (abs(word["top"] - prev_word["top"]) <= merge_threshold and 
-                    word["x0"] - prev_word["x1"] <= merge_threshold * 2):
-                    
-                    # Extend the group
-                    current_group["text"] += " " + word["text"]
-                    current_group["bbox"] = (
-                        min(current_group["bbox"][0], word["x0"]),
-                        min(current_group["bbox"][1], word["top"]),
-                        max(current_group["bbox"][2], word["x1"]),
-                        max(current_group["bbox"][3], word["bottom"])
-                    )
-                    current_group["words"].append(word)
-                else:
-                    # Save current group and start new one
-                    results.append({
-                        "text": current_group["text"],
-                        "bbox": current_group["bbox"],
-                        "page": current_group["page"]
-                    })
-                    
-                    current_group = {
-                        "text": word["text"],
-                        "bbox": (word["x0"], word["top"], word["x1"], word["bottom"]),
-                        "page": page_num,
-                        "words": [word]
-                    }
-            
-            if current_group:
-                results.append({
-                    "text": current_group["text"],
-                    "bbox": current_group["bbox"],
-                    "page": current_group["page"]
-                })
-    
+
+            # Pull the coordinates into NumPy arrays so the merge decisions
+            # run as vectorized comparisons instead of per-word Python math
+            word_count = len(words)
+            word_texts = [w["text"] for w in words]
+            x0 = np.fromiter((w["x0"] for w in words), dtype=np.float32, count=word_count)
+            x1 = np.fromiter((w["x1"] for w in words), dtype=np.float32, count=word_count)
+            top = np.fromiter((w["top"] for w in words), dtype=np.float32, count=word_count)
+            bottom = np.fromiter((w["bottom"] for w in words), dtype=np.float32, count=word_count)
+            _group_words(results, page_index + 1, merge_threshold, word_texts, x0, x1, top, bottom)
+
     return results
 
+def extract_text_with_layout(pdf_path, merge_threshold=10):
+    # Page extraction is embarrassingly parallel, so split the pages over a
+    # small process pool and let each worker open the PDF itself
+    if USE_PYMUPDF:
+        with fitz.open(pdf_path) as pdf:
+            num_pages = len(pdf)
+    else:
+        with pdfplumber.open(pdf_path) as pdf:
+            num_pages = len(pdf.pages)
 
+    if num_pages == 0:
+        return []
 
+    num_workers = min(os.cpu_count() or 1, 4, num_pages)
+    chunk_size = (num_pages + num_workers - 1) // num_workers
+    page_chunks = [list(range(start, min(start + chunk_size, num_pages)))
+                   for start in range(0, num_pages, chunk_size)]
 
-# === NLLB TRANSLATION ===
-if ENABLE_NLLB:
-    print("\n" + "="*60)
-    print("Starting NLLB Translation...")
-    print("="*60)
-    
-    doc = Document(docx_file)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        mapped = executor.map(
+            _extract_pages,
+            [pdf_path] * len(page_chunks),
+            page_chunks,
+            [merge_threshold] * len(page_chunks)
+        )
 
-    count = 0
-    total_paragraphs = len([p for p in doc.paragraphs if p.text.strip()])
-    start_time = time.time()
+    # Chunks are contiguous page ranges, so flattening keeps page order
+    return [result for sub_results in mapped for result in sub_results]
 
-    print(f"Starting translation of {total_paragraphs} paragraphs...")
-
-    for paragraph in doc.paragraphs:
-        if paragraph.text.strip():
-            # Calculate progress and time estimates
-            current_time = time.time()
-            elapsed_time = current_time - start_time
-            
-            if count > 0:
-                avg_time_per_paragraph = elapsed_time / count
-                remaining_paragraphs = total_paragraphs - count
-                estimated_remaining_time = remaining_paragraphs * avg_time_per_paragraph
-                
-                # Format time estimates
-                elapsed_mins = int(elapsed_time // 60)
-                elapsed_secs = int(elapsed_time % 60)
-                remaining_mins = int(estimated_remaining_time // 60)
-                remaining_secs = int(estimated_remaining_time % 60)
-                
-                print(f"Progress {count}/{total_paragraphs} | Elapsed: {elapsed_mins:02d}:{elapsed_secs:02d} | Est. remaining: {remaining_mins:02d}:{remaining_secs:02d}")
-            else:
-                print(f"Progress {count}/{total_paragraphs} | Starting...")
-            
-            count += 1
-            
-            original_text = paragraph.text.strip()
-            print(f"[Para {count}] {original_text}")
-            
-            # Translate the text from Slovak to English
-            tokenizer.src_lang = "slk_Latn"  # Set source language to Slovak
-            tokens = tokenizer(original_text, return_tensors="pt")
-            generated = model.generate(**tokens, forced_bos_token_id=tokenizer.convert_tokens_to_ids("eng_Latn"))
-            translated_text = tokenizer.decode(generated[0], skip_special_tokens=True)
-            
-            # Attempt to apply original formatting
-            success = apply_translation_with_formatting(paragraph, translated_text, original_text, "NLLB ")
-            if success:
-                print(f"Translated: {translated_text}")
-            else:
-                print(f"Keeping original text and highlighting it")
-                
-                # Keep original text but highlight it for manual review
-                paragraph.clear()
-                highlighted_run = paragraph.add_run(f"[TRANSLATION ERROR - MANUAL REVIEW NEEDED] {original_text}")
-                
-                # Add yellow highlighting if possible
-                try:
-                    highlighted_run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-                    highlighted_run.font.color.rgb = RGBColor(255, 0, 0)  # Red text
-                    highlighted_run.bold = True
-                except:
-                    # If highlighting fails, just make it bold and add marker
-                    highlighted_run.bold = True
-            
-            print("-" * 40)
-
-
-    # Final time summary for NLLB version
-    total_time = time.time() - start_time
-    total_mins = int(total_time // 60)
-    total_secs = int(total_time % 60)
 
-    print(f"\nNLLB Translation completed!")
-    print(f"Total paragraphs translated: {total_paragraphs}")
-    print(f"Total time: {total_mins:02d}:{total_secs:02d}")
-    print(f"Average time per paragraph: {total_time/total_paragraphs:.2f} seconds")
 
-    # Save the NLLB translated document
-    import time
-    readable_time = time.strftime("%Y%m%d_%H%M%S", time.localtime(current_time))
 
-    output_filename = docx_file.replace(".docx", f"_NNLB_{readable_time}.docx")
-    doc.save(output_filename)
-    print(f"NLLB translated document saved as: {output_filename}")
+# Raw bytes of each source docx, read from disk at most once; both pipelines
+# parse their own Document from the in-memory copy
+_DOCX_BYTES = {}
 
-# === OLLAMA LLM TRANSLATION ===
-if ENABLE_OLLAMA:
-    print("\n" + "="*60)
-    print("Starting OLLAMA LLM Translation...")
-    print("="*60)
+def _load_document(docx_path):
+    """Parse a fresh Document from an in-memory copy of the file"""
+    if docx_path not in _DOCX_BYTES:
+        with open(docx_path, "rb") as docx_source:
+            _DOCX_BYTES[docx_path] = docx_source.read()
+    return Document(io.BytesIO(_DOCX_BYTES[docx_path]))
 
-    # Load fresh document for Ollama translation
-    doc_ollama = Document(docx_file)
+def translate_document(docx_path, translate_batch_fn, label, tag, error_rgb):
+    """
+    Shared document-translation driver used by both pipelines. Loads the docx
+    once, collects the non-empty paragraphs, skips non-linguistic ones,
+    resolves the rest through translate_batch_fn (a callable mapping a list
+    of texts to a list of translations, failures marked with
+    "[TRANSLATION FAILED...]"), then writes everything back in a single
+    formatting pass with progress logging.
+    """
+    LOG.info("\n" + "=" * 60)
+    LOG.info(f"Starting {label} Translation...")
+    LOG.info("=" * 60)
 
-    count_ollama = 0
-    total_paragraphs_ollama = len([p for p in doc_ollama.paragraphs if p.text.strip()])
-    start_time_ollama = time.time()
-    
-    # Store context for better translation
-    translated_context = []  # Keep track of translated paragraphs for context
-
-    print(f"Starting Ollama translation of {total_paragraphs_ollama} paragraphs...")
-
-    for paragraph in doc_ollama.paragraphs:
-        if paragraph.text.strip():
-            # Calculate progress and time estimates for Olloma
-            current_time = time.time()
-            elapsed_time = current_time - start_time_ollama
-            
-            if count_ollama > 0:
-                avg_time_per_paragraph = elapsed_time / count_ollama
-                remaining_paragraphs = total_paragraphs_ollama - count_ollama
-                estimated_remaining_time = remaining_paragraphs * avg_time_per_paragraph
-                
-                # Format time estimates
-                elapsed_mins = int(elapsed_time // 60)
-                elapsed_secs = int(elapsed_time % 60)
-                remaining_mins = int(estimated_remaining_time // 60)
-                remaining_secs = int(estimated_remaining_time % 60)
-                
-                print(f"Ollama Progress {count_ollama}/{total_paragraphs_ollama} | Elapsed: {elapsed_mins:02d}:{elapsed_secs:02d} | Est. remaining: {remaining_mins:02d}:{remaining_secs:02d}")
-            else:
-                print(f"Ollama Progress {count_ollama}/{total_paragraphs_ollama} | Starting...")
-            
-            count_ollama += 1
-            
-            original_text = paragraph.text.strip()
-            print(f"[Ollama Para {count_ollama}] {original_text}")
-            
-            # Use Ollama LLM translation with context
-            try:
-                # Use context-aware translation
-                translated_text = translate_with_context(original_text, translated_context)
-                
-                # Remove the "translated:" prefix if present
-                if translated_text.lower().startswith("translated:"):
-                    translated_text = translated_text[11:].strip()
-                
-                # Remove quotes at the start and end
-                if translated_text.startswith('"') and translated_text.endswith('"'):
-                    translated_text = translated_text[1:-1].strip()
-                elif translated_text.startswith("'") and translated_text.endswith("'"):
-                    translated_text = translated_text[1:-1].strip()
-                
-                # Check if translation failed after retries
-                if translated_text.startswith("[TRANSLATION FAILED AFTER"):
-                    print(f"Ollama Translation FAILED: {translated_text}")
-                    # Apply highlighting for failed translation
-                    paragraph.clear()
-                    highlighted_run = paragraph.add_run(translated_text)
-                    
-                    # Add red highlighting for failed translations
-                    try:
-                        highlighted_run.font.highlight_color = WD_COLOR_INDEX.RED
-                        highlighted_run.font.color.rgb = RGBColor(255, 255, 255)  # White text
-                        highlighted_run.bold = True
-                    except:
-                        highlighted_run.bold = True
-                    continue  # Skip to next paragraph
-                
-                # Add successful translation to context for next paragraphs
-                translated_context.append(translated_text)
-                # Keep only last 5 paragraphs as context to avoid too much text
-                if len(translated_context) > 5:
-                    translated_context.pop(0)
-                
-                print(f"Ollama Translated: {translated_text}")
-            except Exception as e:
-                print(f"WARNING: Ollama translation failed: {e}")
-                translated_text = f"[OLLAMA TRANSLATION FAILED] {original_text}"
-                
-                # Apply highlighting for exception-based failures
-                paragraph.clear()
-                highlighted_run = paragraph.add_run(translated_text)
-                
-                try:
-                    highlighted_run.font.highlight_color = WD_COLOR_INDEX.RED
-                    highlighted_run.font.color.rgb = RGBColor(255, 255, 255)  # White text
-                    highlighted_run.bold = True
-                except:
-                    highlighted_run.bold = True
-                continue  # Skip to next paragraph
-            
-            # Apply translation with error handling
-            success = apply_translation_with_formatting(paragraph, translated_text, original_text, "OLLAMA ")
-            if success:
-                print(f"Ollama Applied: {translated_text}")
-            else:
-                print(f"Keeping original text and highlighting it")
-                
-                # Keep original text but highlight it for manual review
-                paragraph.clear()
-                highlighted_run = paragraph.add_run(f"[OLLAMA FORMATTING ERROR - MANUAL REVIEW NEEDED] {original_text}")
-                
-                # Add yellow highlighting if possible
-                try:
-                    highlighted_run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-                    highlighted_run.font.color.rgb = RGBColor(0, 0, 255)  # Blue text for Olloma errors
-                    highlighted_run.bold = True
-                except:
-                    # If highlighting fails, just make it bold and add marker
-                    highlighted_run.bold = True
-            
-            print("-" * 40)
-
-    # Final time summary for Ollama version
-    total_time_ollama = time.time() - start_time_ollama
-    total_mins_ollama = int(total_time_ollama // 60)
-    total_secs_ollama = int(total_time_ollama % 60)
-
-    print(f"\nOllama Translation completed!")
-    print(f"Total paragraphs translated: {total_paragraphs_ollama}")
-    print(f"Total time: {total_mins_ollama:02d}:{total_secs_ollama:02d}")
-    print(f"Average time per paragraph: {total_time_ollama/total_paragraphs_ollama:.2f} seconds")
-
-    # Save the Ollama translated document
-    import time
-
-    readable_time = time.strftime("%Y%m%d_%H%M%S", time.localtime(current_time))
-
-    output_filename_ollama = docx_file.replace(".docx", f"_OLLAMA_{readable_time}.docx")
-    doc_ollama.save(output_filename_ollama)
-    print(f"Ollama translated document saved as: {output_filename_ollama}")
-
-# Final summary
-print("\n" + "="*60)
-print("TRANSLATION COMPLETED!")
-if ENABLE_NLLB:
-    print(f"NLLB Version: User_manual_ProfileManagerWeb_v4.3.301_ENG_NLLB.docx")
-if ENABLE_OLLAMA:
-    print(f"Olloma Version: User_manual_ProfileManagerWeb_v4.3.301_ENG_OLLAMA.docx")
-print("="*60)
+    doc = _load_document(docx_path)
+
+    # Collect every non-empty paragraph once, stripping each text a single time
+    items = [(p, t) for p in doc.paragraphs if (t := p.text.strip())]
+    total_paragraphs = len(items)
+    start_time = time.time()
+
+    # Non-linguistic paragraphs (numbers, codes, URLs) are left untouched
+    jobs = [(p, t) for p, t in items if not should_skip_translation(t)]
+    translations = translate_batch_fn([text for _, text in jobs])
+
+    # Sequential write-back pass: python-docx mutations stay single-threaded.
+    # tqdm rate-limits its own redraws, so progress costs nothing per paragraph
+    count = 0
+    progress = tqdm(zip(jobs, translations), total=len(jobs), desc=f"{label} write-back", unit="para")
+    for (paragraph, original_text), translated_text in progress:
+        count += 1
+        LOG.debug(f"[{label} Para {count}] {original_text}")
+        progress.set_postfix_str(translated_text[:40])
+
+        # Check if translation failed after retries
+        if translated_text.startswith("[TRANSLATION FAILED AFTER"):
+            LOG.warning(f"{label} Translation FAILED: {translated_text}")
+            # Keep the failure marker and highlight it for manual review
+            paragraph.clear()
+            _highlight(paragraph.add_run(translated_text), RGBColor(255, 255, 255), WD_COLOR_INDEX.RED)
+            continue  # Skip to next paragraph
+
+        # Attempt to apply original formatting
+        success = apply_translation_with_formatting(paragraph, translated_text, original_text, f"{label} ")
+        if success:
+            LOG.debug(f"{label} Applied: {translated_text}")
+        else:
+            LOG.warning("Keeping original text and highlighting it")
+            # Keep original text but highlight it for manual review
+            paragraph.clear()
+            _highlight(paragraph.add_run(f"[{label} FORMATTING ERROR - MANUAL REVIEW NEEDED] {original_text}"), error_rgb)
+
+    progress.close()
+
+    # Final time summary
+    total_time = time.time() - start_time
+    LOG.info(f"\n{label} Translation completed!")
+    LOG.info(f"Total paragraphs translated: {total_paragraphs}")
+    LOG.info(f"Total time: {int(total_time // 60):02d}:{int(total_time % 60):02d}")
+    if total_paragraphs:
+        LOG.info(f"Average time per paragraph: {total_time / total_paragraphs:.2f} seconds")
+
+    # Save the translated document
+    readable_time = time.strftime("%Y%m%d_%H%M%S")
+    output_filename = docx_path.replace(".docx", f"_{tag}_{readable_time}.docx")
+    doc.save(output_filename)
+    LOG.info(f"{label} translated document saved as: {output_filename}")
+    return output_filename
+
+# The job itself only runs in the main process; ProcessPoolExecutor
+# workers re-import this module and must stop at the definitions above
+if __name__ == "__main__":
+    # === TRANSLATION ===
+    nllb_output = None
+    ollama_output = None
+    if ENABLE_NLLB and ENABLE_OLLAMA:
+        # NLLB is local-compute-bound while Ollama waits on an external server, so
+        # the two pipelines overlap almost perfectly when run on separate threads.
+        # Each works on its own Document and output file; the only shared state is
+        # the read-only source bytes. (The two tqdm bars will interleave.)
+        async def _run_both():
+            return await asyncio.gather(
+                asyncio.to_thread(translate_document, docx_file, translate_texts_nllb, "NLLB", "NNLB", RGBColor(255, 0, 0)),
+                asyncio.to_thread(translate_document, docx_file, translate_texts_ollama, "Ollama", "OLLAMA", RGBColor(0, 0, 255))
+            )
+
+        nllb_output, ollama_output = asyncio.run(_run_both())
+    elif ENABLE_NLLB:
+        nllb_output = translate_document(docx_file, translate_texts_nllb, "NLLB", "NNLB", RGBColor(255, 0, 0))
+    elif ENABLE_OLLAMA:
+        ollama_output = translate_document(docx_file, translate_texts_ollama, "Ollama", "OLLAMA", RGBColor(0, 0, 255))
+
+    # Final summary
+    LOG.info("\n" + "="*60)
+    LOG.info("TRANSLATION COMPLETED!")
+    if nllb_output:
+        LOG.info(f"NLLB Version: {nllb_output}")
+    if ollama_output:
+        LOG.info(f"Ollama Version: {ollama_output}")
+    LOG.info("="*60)